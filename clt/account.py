@@ -1,14 +1,9 @@
-import asyncio
 import os
-from collections import defaultdict
 from datetime import date
 
 import click
-import pandas
-from tabulate import tabulate
 
-from clt import broker as br
-from clt.utils import asink, green, load_and_spin, red
+from clt.utils import asink, gather_or_cancel, green, load_and_spin, red
 
 
 @click.group(invoke_without_command=True)
@@ -19,41 +14,40 @@ async def account(ctx, plot):
     if ctx.invoked_subcommand is not None:
         return
 
-    print(ctx)
-    broker = ctx.obj.get("context").broker
-
-    balances, pnl, account_history = await load_and_spin(
-        asyncio.gather(
-            broker.account_balance,
-            broker.account_pnl(since_date=date(year=2015, month=1, day=1)),
-            broker.account_history(),
-        ),
-        "loading",
-        persist=False,
-    )
+    async with ctx.obj.get("context").broker as broker:
+        balances, pnl, account_history = await load_and_spin(
+            gather_or_cancel(
+                broker.account_balance,
+                broker.account_pnl(since_date=date(year=2015, month=1, day=1)),
+                broker.account_history(),
+            ),
+            "loading",
+            persist=False,
+        )
 
     if plot:
-        agg = defaultdict(int)
-        for x, y in [(x.time_closed, x.proceeds - x.cost_basis) for x in pnl] + [
-            (x.date, x.amount) for x in account_history
-        ]:
-            agg[x] += y
-
-        running_sum = 0
-        account_value = []
-        for x, y in sorted(agg.items(), key=lambda x: x[0]):
-            running_sum += y
-            print(x, running_sum)
-            account_value.append((x, running_sum, 0, 0, 0))
-
-        df = pandas.DataFrame(account_value, columns=("date", "close", "open", "high", "low"))
-        df["date"] = pandas.to_datetime(df["date"])
-        df = df.set_index("date")
+        import pandas
+
+        amounts = pandas.Series(
+            [x.proceeds - x.cost_basis for x in pnl] + [x.amount for x in account_history],
+            index=pandas.DatetimeIndex(
+                [x.time_closed for x in pnl] + [x.date for x in account_history], name="date"
+            ),
+            dtype=float,
+        )
+
+        # summed per timestamp and sorted by the groupby, with the running total as the close
+        df = pandas.DataFrame({"close": amounts.groupby(level=0).sum().cumsum()})
+        df["open"] = df["high"] = df["low"] = 0
         # mplfinance.plot(df, type='line')
         return
 
+    from tabulate import tabulate
+
+    base = balances.total_equity - balances.open_pl
+    open_pl_percentage = (balances.open_pl / base) * 100
+
     click.echo("")
-    open_pl_percentage = (balances.open_pl / (balances.total_equity - balances.open_pl)) * 100
     click.echo(
         tabulate(
             [
@@ -84,23 +78,26 @@ async def account(ctx, plot):
 @click.pass_context
 @asink
 async def returns(ctx, plot):
-    broker = ctx.obj.get("context").broker
-
     since = date(year=date.today().year, month=1, day=1)
 
-    balances, pnl, history_ = await load_and_spin(
-        asyncio.gather(
-            broker.account_balance, broker.account_pnl(since_date=since), broker.account_history()
-        ),
-        "loading",
-        persist=False,
-    )
+    async with ctx.obj.get("context").broker as broker:
+        balances, pnl, history_ = await load_and_spin(
+            gather_or_cancel(
+                broker.account_balance,
+                broker.account_pnl(since_date=since),
+                broker.account_history(),
+            ),
+            "loading",
+            persist=False,
+        )
 
     pnl_sum = sum(x.proceeds - x.cost_basis for x in pnl)
     account_value = balances.total_equity - balances.open_pl
 
     returns_ = (pnl_sum / (account_value - pnl_sum)) * 100
 
+    from tabulate import tabulate
+
     click.echo("")
     click.echo(
         tabulate(
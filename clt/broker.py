@@ -1,15 +1,35 @@
+import asyncio
+import sys
+import time
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from dataclasses import dataclass
 from datetime import date, datetime
 from enum import Enum
-from typing import Collection, List, Tuple
+from operator import itemgetter
+from typing import Collection, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlencode
 
 import click
 import httpx
+import orjson
 from httpx import codes
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from tenacity import AsyncRetrying, stop_after_attempt
 
+from clt import cache
+
+_quote_fields = itemgetter("symbol", "last")
+
+# fields common to every equity order placed through Tradier
+_order_form_prefix = "class=equity&duration=gtc&"
+_form_headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def _parse_timestamp(value: str) -> datetime:
+    # Tradier timestamps look like 2023-04-01T14:30:00.000Z; fromisoformat is much
+    # cheaper than strptime but only understands the trailing Z from 3.11 onwards
+    return datetime.fromisoformat(value.rstrip("Z"))
+
 
 class Position(BaseModel):
     name: str
@@ -17,14 +37,27 @@ class Position(BaseModel):
     cost_basis: float
     time_opened: datetime
 
+    # lowercased name, computed on first comparison and reused for every
+    # set/dict lookup after that
+    _key: str = PrivateAttr(None)
+
+    class Config:
+        frozen = True
+
+    def _name_key(self) -> str:
+        if self._key is None:
+            self._key = sys.intern(self.name.lower())
+        return self._key
+
     def __hash__(self):
-        return hash(self.name)
+        return hash(self._name_key())
 
     def __eq__(self, other):
         if isinstance(other, Position):
-            return self.name.lower() == other.name.lower()
+            return self._name_key() == other._name_key()
         elif isinstance(other, str):
-            return self.name.lower() == other.lower()
+            return self._name_key() == other.lower()
+        return NotImplemented
 
 
 class ClosedPosition(Position):
@@ -37,6 +70,9 @@ class AccountAction(BaseModel):
     amount: float
     date: datetime
 
+    class Config:
+        frozen = True
+
 
 class OrderStatus(Enum):
     OPEN = "open"
@@ -52,12 +88,19 @@ class OrderStatus(Enum):
     HELD = "held"
 
 
+_order_statuses = {status.value: status for status in OrderStatus}
+
+
 class MarketDay(BaseModel):
     open: datetime
     close: datetime
 
+    class Config:
+        frozen = True
+
 
-class Order(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Order:
     id: str
     name: str
     side: str
@@ -67,45 +110,19 @@ class Order(BaseModel):
     avg_fill_price: float
 
 
-class Quote(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Quote:
     name: str
     price: float
 
 
+@dataclass(slots=True, frozen=True)
 class AccountBalance:
-    def __init__(
-        self,
-        total_cash: float,
-        total_equity: float,
-        open_pl: float,
-        long_value: float,
-        settled_cash: float,
-    ):
-        self._total_cash = total_cash
-        self._total_equity = total_equity
-        self._open_pl = open_pl
-        self._long_value = long_value
-        self._settled_cash = settled_cash
-
-    @property
-    def total_cash(self):
-        return self._total_cash
-
-    @property
-    def total_equity(self):
-        return self._total_equity
-
-    @property
-    def open_pl(self):
-        return self._open_pl
-
-    @property
-    def long_value(self):
-        return self._long_value
-
-    @property
-    def settled_cash(self):
-        return self._settled_cash
+    total_cash: float
+    total_equity: float
+    open_pl: float
+    long_value: float
+    settled_cash: Optional[float]
 
 
 class ReturnStream:
@@ -117,13 +134,18 @@ class ReturnStream:
     ):
         self._initial = initial
 
-        position_gains = [(x.time_closed, x.proceeds - x.cost_basis) for x in closed_positions]
+        times = [x.time_closed for x in closed_positions]
+        times += [dt for dt, _ in admin_adjustments]
+        gains = [x.proceeds - x.cost_basis for x in closed_positions]
+        gains += [gl for _, gl in admin_adjustments]
+
+        import pandas
 
-        grouped_dollar_gains = defaultdict(float)
-        for dt, gl in position_gains + admin_adjustments:
-            grouped_dollar_gains[dt.date()] += gl
+        # truncate to days on the whole index at once instead of a .date() per row
+        days = pandas.DatetimeIndex(times).normalize()
 
-        self._gains = sorted(grouped_dollar_gains.items(), key=lambda x: x[0])
+        # daily dollar gains, summed and sorted by date in one vectorized groupby
+        self._gains = pandas.Series(gains, index=days, dtype=float).groupby(level=0).sum()
 
     @staticmethod
     def __percent_change(start, end):
@@ -131,30 +153,34 @@ class ReturnStream:
 
     @property
     def total_return(self) -> float:
-        return ReturnStream.__percent_change(self._initial, sum(x[1] for x in self._gains))
+        return ReturnStream.__percent_change(self._initial, self._gains.sum())
 
     @property
     def ytd_return(self) -> float:
         current_year = datetime.utcnow().year
-        starting_amount = sum(x[1] for x in self._gains if x[0].year < current_year)
-        current_amount = sum(x[1] for x in self._gains)
+        starting_amount = self._gains[self._gains.index.year < current_year].sum()
+        current_amount = self._gains.sum()
         return ReturnStream.__percent_change(starting_amount, current_amount)
 
     @property
     def returns(self) -> Collection[Tuple[datetime, float]]:
-        last_value = self._initial
-        percentage_returns = []
-        for dt, gl in self._gains:
-            rtn = ReturnStream.__percent_change(self._initial, last_value + gl)
-            percentage_returns.append((dt, rtn))
-            last_value += gl
-        return percentage_returns
+        percentage_returns = (self._gains.cumsum() / self._initial) * 100
+        return list(zip(self._gains.index.date, percentage_returns))
 
 
 class Broker(ABC):
     def __init__(self, account_number: str):
         self._account_number = account_number
 
+    async def aclose(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
     @abstractmethod
     async def place_market_sell(self, name: str, quantity: int):
         pass
@@ -214,21 +240,93 @@ class Tradier(Broker):
 
         self._api_env = kwargs.get("env", "api")  # can also be 'sandbox'
 
-        self._headers = dict(Accept="application/json", Authorization=f"Bearer {access_token}")
+        # headers are registered once on the client rather than passed with every request
+        self._headers = (
+            ("Accept", "application/json"),
+            ("Authorization", f"Bearer {access_token}"),
+        )
 
-    def _form_url(self, endpoint):
-        tradier_api_url = f"{self._api_env}.tradier.com"
-        tradier_api_version = "v1"
+        # the client is built lazily and tied to the event loop it was first used on
+        self._http_client = None
+        self._client_loop = None
+
+        # endpoint paths are fixed for the account, so build them once up front
+        account_path = f"/accounts/{account_number}"
+        self._orders_path = f"{account_path}/orders"
+        self._balances_path = f"{account_path}/balances/"
+        self._positions_path = f"{account_path}/positions/"
+        self._gainloss_path = f"{account_path}/gainloss"
+        self._history_path = f"{account_path}/history/"
+        self._quotes_path = "/markets/quotes/"
+        self._calendar_path = "/markets/calendar/"
+
+        # quotes are cached briefly so repeated lookups of the same symbol skip the network
+        self._quote_cache: Dict[str, Tuple[Quote, float]] = {}
+        self._quote_ttl = kwargs.get("quote_ttl", 2.0)
+
+        # single-symbol lookups made in the same loop tick are folded into one request
+        self._pending_quotes: Dict[str, asyncio.Future] = {}
+        self._quote_flush = None
+
+        # after repeated server errors, stop calling Tradier for a short cool-off period
+        self._breaker_threshold = 5
+        self._breaker_cooldown = 30.0
+        self._breaker_failures = 0
+        self._breaker_open_until = 0.0
+
+    def _new_client(self) -> httpx.AsyncClient:
+        # one client for the lifetime of the broker so that connections are pooled
+        # and kept alive across calls instead of re-handshaking on every request. HTTP/2
+        # lets concurrent requests multiplex over that single connection.
+        # connect failures are retried by the transport itself on a pooled socket
+        return httpx.AsyncClient(
+            base_url=f"https://{self._api_env}.tradier.com/v1",
+            headers=self._headers,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(
+                    max_connections=50, max_keepalive_connections=20, keepalive_expiry=60
+                ),
+            ),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            event_hooks={"request": [self._check_breaker], "response": [self._record_response]},
+        )
 
-        if tradier_api_url is None or tradier_api_version is None:
-            raise EnvironmentError("TRADIER_API and TRADIER_API_VERSION cannot be null")
+    async def _check_breaker(self, request: httpx.Request):
+        if time.monotonic() < self._breaker_open_until:
+            raise IOError(
+                f"not sending {request.method} {request.url.path} to Tradier, "
+                f"too many recent server errors"
+            )
 
-        base = f"https://{tradier_api_url}/{tradier_api_version}"
-        components = (base, endpoint)
-        almost_there = "/".join(x.strip("/") for x in components)
-        complete_url = almost_there.replace("[[account]]", self._account_number)
+    async def _record_response(self, response: httpx.Response):
+        if response.status_code < 500:
+            self._breaker_failures = 0
+            return
 
-        return complete_url
+        self._breaker_failures += 1
+        if self._breaker_failures >= self._breaker_threshold:
+            self._breaker_open_until = time.monotonic() + self._breaker_cooldown
+            self._breaker_failures = 0
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        # pooled connections belong to the loop that opened them, so a broker reused
+        # under a new event loop (e.g. a second asyncio.run) gets a fresh client
+        loop = asyncio.get_running_loop()
+        if self._client_loop is not loop:
+            self._http_client = self._new_client()
+            self._client_loop = loop
+        return self._http_client
+
+    # the broker owns a connection pool; either use it as an async context manager or
+    # await aclose() when done with it
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._client_loop = None
 
     async def _place_order(
         self,
@@ -238,27 +336,21 @@ class Tradier(Broker):
         order_type: str = "market",
         stop_price: float = None,
     ) -> str:
-        payload = {
-            "class": "equity",
-            "symbol": name,
-            "side": side,
-            "quantity": quantity,
-            "type": order_type,
-            "duration": "gtc",
-        }
+        payload = {"symbol": name, "side": side, "quantity": quantity, "type": order_type}
 
         if order_type in ("stop", "stop_limit"):
             payload["stop"] = stop_price
 
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.post(
-                        url=self._form_url("/accounts/[[account]]/orders"),
-                        data=payload,
-                        headers=self._headers,
-                    )
-                    x = response
+        # encode the form body once up front rather than on every retry
+        content = f"{_order_form_prefix}{urlencode(payload)}".encode()
+
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.post(
+                    url=self._orders_path, content=content, headers=_form_headers
+                )
+
+        cache.clear(self._account_number)
 
         if response.status_code != codes.OK:
             raise IOError(
@@ -266,7 +358,7 @@ class Tradier(Broker):
                 f"for {name} with a status code of"
                 f" {response.status_code}: {response.text}"
             )
-        return response.json()["order"]["id"]
+        return orjson.loads(response.content)["order"]["id"]
 
     async def place_market_sell(self, name: str, quantity: int) -> str:
         return await self._place_order(name, quantity, "sell")
@@ -279,41 +371,39 @@ class Tradier(Broker):
 
     @property
     async def account_balance(self) -> AccountBalance:
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url("/accounts/[[account]]/balances/"), headers=self._headers
-                    )
-
-        if response.status_code != httpx.codes.OK:
-            raise IOError(
-                f"failed to get account balance for account "
-                f"{self._account_number} with a status code of "
-                f"{response.status_code}: {response.text}"
-            )
-
-        balances = response.json()["balances"]
+        balances = await self._fetch_balances()
 
         return AccountBalance(
             total_cash=balances["total_cash"],
             total_equity=balances["total_equity"],
             open_pl=balances["open_pl"],
             long_value=balances["long_market_value"],
-            settled_cash=float(balances["cash"]["cash_available"]) - float(balances["cash"]["unsettled_funds"])
+            settled_cash=float(balances["cash"]["cash_available"])
+            - float(balances["cash"]["unsettled_funds"])
             if balances["account_type"] == "cash"
             else None,
         )
 
-    @property
-    async def positions(self) -> List[Position]:
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url("/accounts/[[account]]/positions/"),
-                        headers=self._headers,
-                    )
+    @cache.ttl_cache(seconds=5)
+    async def _fetch_balances(self) -> dict:
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(url=self._balances_path)
+
+        if response.status_code != httpx.codes.OK:
+            raise IOError(
+                f"failed to get account balance for account "
+                f"{self._account_number} with a status code of "
+                f"{response.status_code}: {response.text}"
+            )
+
+        return orjson.loads(response.content)["balances"]
+
+    @cache.ttl_cache(seconds=15)
+    async def _fetch_positions(self) -> List[dict]:
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(url=self._positions_path)
 
         if response.status_code != httpx.codes.OK:
             raise IOError(
@@ -322,50 +412,111 @@ class Tradier(Broker):
                 f"{response.status_code}: {response.text}"
             )
 
-        if response.json()["positions"] in (None, "null"):
+        positions = orjson.loads(response.content).get("positions")
+
+        if positions in (None, "null"):
             return list()
 
-        positions = response.json()["positions"]["position"]
+        positions = positions["position"]
 
-        if isinstance(positions, list):
-            return [
-                Position(
-                    name=pos["symbol"],
-                    size=pos["quantity"],
-                    cost_basis=pos["cost_basis"],
-                    time_opened=datetime.strptime(pos["date_acquired"], "%Y-%m-%dT%H:%M:%S.%fZ"),
-                )
-                for pos in positions
-            ]
+        # a single held position comes back as a bare object rather than a list
+        if not isinstance(positions, list):
+            positions = [positions]
 
-        else:
-            return [
-                Position(
-                    name=positions["symbol"],
-                    size=positions["quantity"],
-                    cost_basis=positions["cost_basis"],
-                    time_opened=datetime.strptime(
-                        positions["date_acquired"], "%Y-%m-%dT%H:%M:%S.%fZ"
-                    ),
-                )
-            ]
+        return positions
 
-    async def get_quote(self, name: str) -> Quote:
-        quotes = await self.get_quotes([name])
-        return quotes[0]
+    @property
+    async def positions(self) -> List[Position]:
+        return [
+            Position.construct(
+                name=pos["symbol"],
+                size=int(pos["quantity"]),
+                cost_basis=float(pos["cost_basis"]),
+                time_opened=_parse_timestamp(pos["date_acquired"]),
+            )
+            for pos in await self._fetch_positions()
+        ]
 
-    async def get_quotes(self, names: Collection[str]) -> List[Quote]:
+    async def position_symbols(self) -> FrozenSet[str]:
+        # for membership checks that don't need full Position objects
+        return frozenset(pos["symbol"].upper() for pos in await self._fetch_positions())
+
+    async def get_quote(self, name: str) -> Quote:
+        key = name.upper()
+        future = self._pending_quotes.get(key)
+
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending_quotes:
+                loop.call_soon(self._flush_quotes)
+            future = self._pending_quotes[key] = loop.create_future()
+
+        # the future is shared by every caller asking for this symbol, so one of them being
+        # cancelled must not cancel it for the rest
+        return await asyncio.shield(future)
+
+    def _flush_quotes(self):
+        pending, self._pending_quotes = self._pending_quotes, {}
+        self._quote_flush = asyncio.ensure_future(self._resolve_quotes(pending))
+
+    async def _resolve_quotes(self, pending: Dict[str, asyncio.Future]):
+        try:
+            quotes = await self.get_quotes(list(pending))
+        except Exception as error:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for quote in quotes:
+            future = pending.pop(quote.name.upper(), None)
+            if future is not None and not future.done():
+                future.set_result(quote)
+
+        for name, future in pending.items():
+            if not future.done():
+                future.set_exception(IOError(f"no quote returned from Tradier for {name}"))
+
+    async def get_quotes(self, names: Collection[str], chunk_size: int = 200) -> List[Quote]:
         if not names:
             return []
 
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url("/markets/quotes/"),
-                        params=dict(symbols=",".join(names), greeks=False),
-                        headers=self._headers,
-                    )
+        now = time.monotonic()
+        fresh, stale = [], []
+        for name in names:
+            cached = self._quote_cache.get(name.upper())
+            if cached is not None and now - cached[1] < self._quote_ttl:
+                fresh.append(cached[0])
+            else:
+                stale.append(name)
+
+        if not stale:
+            return fresh
+
+        # large symbol lists are split up and requested concurrently over the shared client
+        chunks = [stale[i : i + chunk_size] for i in range(0, len(stale), chunk_size)]
+
+        quotes = await asyncio.gather(*[self._get_quotes(chunk) for chunk in chunks])
+        quotes = [quote for chunk in quotes for quote in chunk]
+
+        fetched_at = time.monotonic()
+        for quote in quotes:
+            self._quote_cache[quote.name.upper()] = (quote, fetched_at)
+
+        # back in the order the names were asked for, whichever of them came from the cache
+        by_name = {quote.name.upper(): quote for quote in (*fresh, *quotes)}
+        return [by_name[name.upper()] for name in names if name.upper() in by_name]
+
+    def invalidate_quote(self, name: str):
+        self._quote_cache.pop(name.upper(), None)
+
+    async def _get_quotes(self, names: Collection[str]) -> List[Quote]:
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(
+                    url=self._quotes_path,
+                    params=dict(symbols=",".join(names), greeks=False),
+                )
 
         if response.status_code != codes.OK:
             raise IOError(
@@ -373,21 +524,19 @@ class Tradier(Broker):
                 f"with a status code of {response.status_code}: {response.text}"
             )
 
-        quotes = response.json()["quotes"]["quote"]
+        quotes = orjson.loads(response.content)["quotes"]["quote"]
 
-        if isinstance(quotes, list):
-            return [Quote(name=quote["symbol"], price=float(quote["last"])) for quote in quotes]
-        else:
-            return [Quote(name=quotes["symbol"], price=float(quotes["last"]))]
+        if not isinstance(quotes, list):
+            quotes = [quotes]
+
+        return [
+            Quote(name=symbol, price=float(last)) for symbol, last in map(_quote_fields, quotes)
+        ]
 
     async def order_status(self, order_id: str) -> Order:
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url(f"/accounts/[[account]]/orders/{order_id}"),
-                        headers=self._headers,
-                    )
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(url=f"{self._orders_path}/{order_id}")
 
         if response.status_code != httpx.codes.OK:
             raise IOError(
@@ -396,26 +545,52 @@ class Tradier(Broker):
                 f"{response.status_code}: {response.text}"
             )
 
-        order = response.json()["order"]
+        return self._parse_order(order_id, orjson.loads(response.content)["order"])
+
+    async def order_statuses(self, order_ids: Collection[str]) -> List[Order]:
+        if len(order_ids) == 1:
+            return [await self.order_status(next(iter(order_ids)))]
+
+        # one request for every order on the account rather than one per id. this has to be
+        # live, so it goes around the orders cache
+        wanted = {str(order_id) for order_id in order_ids}
+        orders = [
+            self._parse_order(order["id"], order)
+            for order in await self._request_orders()
+            if str(order["id"]) in wanted
+        ]
+
+        # anything not in the account's order list is looked up on its own
+        missing = wanted.difference(order.id for order in orders)
+        if missing:
+            orders += await asyncio.gather(*[self.order_status(order_id) for order_id in missing])
 
+        return orders
+
+    @staticmethod
+    def _parse_order(order_id, order) -> Order:
         return Order(
-            id=order_id,
+            id=str(order_id),
             name=order["symbol"],
             side=order["side"],
             type=order["type"],
-            status=OrderStatus(order["status"]),
+            status=_order_statuses.get(order["status"], OrderStatus.ERROR),
             executed_quantity=int(float(order["exec_quantity"])),
             avg_fill_price=float(order["avg_fill_price"]),
         )
 
     @property
     async def orders(self) -> Collection[Order]:
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url(f"/accounts/[[account]]/orders"), headers=self._headers
-                    )
+        return [self._parse_order(order["id"], order) for order in await self._fetch_orders()]
+
+    @cache.ttl_cache(seconds=15)
+    async def _fetch_orders(self) -> List[dict]:
+        return await self._request_orders()
+
+    async def _request_orders(self) -> List[dict]:
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(url=self._orders_path)
 
         if response.status_code != httpx.codes.OK:
             raise IOError(
@@ -423,36 +598,26 @@ class Tradier(Broker):
                 f"{response.status_code}: {response.text}"
             )
 
-        orders = response.json()["orders"]
-        orders = (
-            []
-            if orders == "null"
-            else [orders["order"]]
-            if type(orders["order"]) is dict
-            else orders["order"]
-        )
+        orders = orjson.loads(response.content)["orders"]
 
-        return [
-            Order(
-                id=order["id"],
-                name=order["symbol"],
-                side=order["side"],
-                type=order["type"],
-                status=OrderStatus(order["status"]),
-                executed_quantity=int(float(order["exec_quantity"])),
-                avg_fill_price=float(order["avg_fill_price"]),
-            )
-            for order in orders
-        ]
+        if orders == "null":
+            return list()
+
+        orders = orders["order"]
+
+        # a single order comes back as a bare object rather than a list
+        if not isinstance(orders, list):
+            orders = [orders]
+
+        return orders
 
     async def cancel_order(self, order_id):
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.delete(
-                        url=self._form_url(f"/accounts/[[account]]/orders/{order_id}"),
-                        headers=self._headers,
-                    )
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.delete(url=f"{self._orders_path}/{order_id}")
+
+        # balances, positions and orders are all stale once an order changes
+        cache.clear(self._account_number)
 
         if response.status_code != httpx.codes.OK:
             raise IOError(
@@ -461,19 +626,59 @@ class Tradier(Broker):
             )
 
     async def account_pnl(self, since_date: date = None) -> List[ClosedPosition]:
-        if since_date is None:
-            params_ = None
+        gainloss = await self._fetch_gainloss(since_date)
+
+        closed_positions = [
+            ClosedPosition.construct(
+                name=x["symbol"],
+                size=int(x["quantity"]),
+                cost_basis=float(x["cost"]),
+                time_opened=_parse_timestamp(x["open_date"]),
+                time_closed=_parse_timestamp(x["close_date"]),
+                proceeds=float(x["proceeds"]),
+            )
+            for x in gainloss
+        ]
+
+        return closed_positions
+
+    async def _fetch_gainloss(self, since_date: Optional[date]) -> List[dict]:
+        # closed trades never change, so they are kept on disk and only the ones closed on or
+        # after the most recent stored trade are requested again. the key sits outside the
+        # account prefix so placing an order does not throw the history away
+        key = f"gainloss.{self._account_number}"
+        since = None if since_date is None else since_date.isoformat()
+
+        stored = cache.get(key, ttl=float("inf"))
+
+        # the stored trades are only any use if they reach back at least as far as asked for
+        covered = stored is not None and (
+            stored["since"] is None or (since is not None and stored["since"] <= since)
+        )
+
+        if not covered:
+            stored = {"since": since, "closed": await self._request_gainloss(since)}
         else:
-            params_ = {"start": since_date.strftime("%Y-%m-%d")}
+            # more trades can still close on the latest stored day, so that day is fetched again
+            latest = max((x["close_date"][:10] for x in stored["closed"]), default=stored["since"])
+            if latest is not None:
+                kept = [x for x in stored["closed"] if x["close_date"][:10] < latest]
+            else:
+                kept = []
+            stored["closed"] = kept + await self._request_gainloss(latest)
 
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url("/accounts/[[account]]/gainloss"),
-                        params=params_,
-                        headers=self._headers,
-                    )
+        cache.put(key, stored)
+
+        if since is None:
+            return stored["closed"]
+        return [x for x in stored["closed"] if x["close_date"][:10] >= since]
+
+    async def _request_gainloss(self, since: Optional[str]) -> List[dict]:
+        params_ = None if since is None else {"start": since}
+
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(url=self._gainloss_path, params=params_)
 
         if response.status_code != codes.OK:
             raise IOError(
@@ -482,48 +687,43 @@ class Tradier(Broker):
                 f"{response.text}"
             )
 
-        gainloss = response.json()["gainloss"]["closed_position"]
+        gainloss = orjson.loads(response.content)["gainloss"]
 
-        closed_positions = [
-            ClosedPosition(
-                name=x["symbol"],
-                size=x["quantity"],
-                cost_basis=x["cost"],
-                time_opened=x["open_date"],
-                time_closed=x["close_date"],
-                proceeds=x["proceeds"],
-            )
-            for x in gainloss
-        ]
+        if gainloss == "null":
+            return list()
 
-        return closed_positions
+        gainloss = gainloss["closed_position"]
+
+        # a single closed position comes back as a bare object rather than a list
+        if not isinstance(gainloss, list):
+            gainloss = [gainloss]
+
+        return gainloss
 
     async def account_history(self):
         return []
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url("/accounts/[[account]]/history/"),
-                        params=dict(
-                            limit=10000,
-                            type=",".join(
-                                (
-                                    "ach",
-                                    "wire",
-                                    "dividend",
-                                    "fee",
-                                    "tax",
-                                    "journal",
-                                    "check",
-                                    "transfer",
-                                    "adjustment",
-                                    "interest",
-                                )
-                            ),
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(
+                    url=self._history_path,
+                    params=dict(
+                        limit=10000,
+                        type=",".join(
+                            (
+                                "ach",
+                                "wire",
+                                "dividend",
+                                "fee",
+                                "tax",
+                                "journal",
+                                "check",
+                                "transfer",
+                                "adjustment",
+                                "interest",
+                            )
                         ),
-                        headers=self._headers,
-                    )
+                    ),
+                )
 
         # click.echo(response.json())
         if response.status_code != codes.OK:
@@ -541,12 +741,26 @@ class Tradier(Broker):
         return []
 
     async def calendar(self) -> List[MarketDay]:
-        async with httpx.AsyncClient() as client:
-            async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
-                with attempt:
-                    response = await client.get(
-                        url=self._form_url("/markets/calendar/"), headers=self._headers
-                    )
+        today = date.today()
+        return [
+            MarketDay.construct(
+                open=datetime.fromisoformat(f"{day['date']}T{day['open']['start']}"),
+                close=datetime.fromisoformat(f"{day['date']}T{day['open']['end']}"),
+            )
+            for day in await self._fetch_calendar(today.year, today.month)
+            if day["status"] == "open"
+        ]
+
+    # the trading calendar for the month only changes with exchange announcements. the
+    # month is part of the cache key so a new month never gets the last one's calendar, and
+    # it is kept apart from the account's entries so placing an order does not clear it
+    @cache.ttl_cache(seconds=24 * 60 * 60, prefix="calendar")
+    async def _fetch_calendar(self, year: int, month: int) -> List[dict]:
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(4)):
+            with attempt:
+                response = await self._client.get(
+                    url=self._calendar_path, params={"year": year, "month": f"{month:02}"}
+                )
 
         if response.status_code != codes.OK:
             raise IOError(
@@ -554,4 +768,4 @@ class Tradier(Broker):
                 f"with a status code of {response.status_code}: {response.text}"
             )
 
-        return None
+        return orjson.loads(response.content)["calendar"]["days"]["day"]
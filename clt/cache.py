@@ -0,0 +1,79 @@
+import os
+import time
+from functools import wraps
+
+import orjson
+
+from clt.config import BASE_DIR
+
+_cache_dir = os.path.join(BASE_DIR, "cache")
+_enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def _cache_file(key: str) -> str:
+    return os.path.join(_cache_dir, f"{key}.json")
+
+
+def get(key: str, ttl: float):
+    if not _enabled:
+        return None
+
+    cache_file = _cache_file(key)
+
+    try:
+        if time.time() - os.path.getmtime(cache_file) > ttl:
+            return None
+        with open(cache_file, "rb") as file:
+            return orjson.loads(file.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def put(key: str, value):
+    if not _enabled:
+        return
+
+    os.makedirs(_cache_dir, exist_ok=True)
+
+    with open(_cache_file(key), "wb") as file:
+        file.write(orjson.dumps(value))
+
+
+def clear(prefix: str):
+    if not os.path.exists(_cache_dir):
+        return
+
+    for entry in os.scandir(_cache_dir):
+        if entry.name.startswith(f"{prefix}."):
+            os.remove(entry.path)
+
+
+def ttl_cache(seconds: float, prefix: str = None):
+    """
+    Cache the JSON-serializable result of a broker method on disk for the given
+    number of seconds, keyed on the broker's account number, the method name and any
+    positional arguments it is called with. Data that does not belong to the account
+    can be given its own prefix instead, so clearing the account's entries leaves it be.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        async def wrapper(self, *args, **kwargs):
+            key_prefix = (prefix,) if prefix else (self._account_number, f.__name__)
+            key = ".".join((*key_prefix, *map(str, args)))
+
+            value = get(key, seconds)
+            if value is None:
+                value = await f(self, *args, **kwargs)
+                put(key, value)
+
+            return value
+
+        return wrapper
+
+    return decorator
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 import pydantic
 import yaml
@@ -14,6 +15,11 @@ BASE_DIR = __clt_base_dir
 
 _config_file = os.path.join(BASE_DIR, "config.yaml")
 
+# libyaml's C parser and emitter are much faster than the pure Python ones, so use them
+# whenever PyYAML was built against it
+yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+yaml_dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 class Config(pydantic.BaseModel):
     context: str
@@ -22,15 +28,17 @@ class Config(pydantic.BaseModel):
         global _config_file
         with open(_config_file, "w") as file:
             try:
-                yaml.dump(self.dict(), file, default_flow_style=False)
+                yaml.dump(self.dict(), file, Dumper=yaml_dumper, default_flow_style=False)
             except yaml.YAMLError as error:
                 print(error)
 
 
+# the files do not change while a command runs, so read each one at most once
+@lru_cache(maxsize=8)
 def load_config() -> Config:
     with open(_config_file, "r") as file:
         try:
-            config_yaml = yaml.safe_load(file)
+            config_yaml = yaml.load(file, Loader=yaml_loader)
         except yaml.YAMLError as error:
             print(error)
 
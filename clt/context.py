@@ -1,16 +1,20 @@
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 import click
 import pydantic
 import yaml
 
 from clt import broker as br
-from clt.config import BASE_DIR
+from clt.config import BASE_DIR, yaml_dumper, yaml_loader
 
 __context_dir = os.path.join(BASE_DIR, "context")
 
+if not os.path.exists(__context_dir):
+    os.makedirs(__context_dir)
+
 
 class Account(pydantic.BaseModel):
     name: str
@@ -18,15 +22,38 @@ class Account(pydantic.BaseModel):
     number: str
     token: str
 
+    # read-only once loaded, so nothing needs copying when it is validated into a Context
+    class Config:
+        frozen = True
+        copy_on_model_validation = "none"
+
 
 class WatchlistItem(pydantic.BaseModel):
     name: str
     notes: str
 
+    # read-only once loaded, so nothing needs copying when it is validated into a Context
+    class Config:
+        frozen = True
+        copy_on_model_validation = "none"
+
+    # lowercased name, computed on first comparison and reused after that
+    _key: str = pydantic.PrivateAttr(None)
+
+    def _name_key(self) -> str:
+        if self._key is None:
+            self._key = self.name.lower()
+        return self._key
+
+    def __hash__(self):
+        return hash(self._name_key())
+
     def __eq__(self, value):
-        if type(value) == str:
-            return self.name.lower() == value.lower()
-        return False
+        if isinstance(value, WatchlistItem):
+            return self._name_key() == value._name_key()
+        elif isinstance(value, str):
+            return self._name_key() == value.lower()
+        return NotImplemented
 
 
 class Context(pydantic.BaseModel):
@@ -34,34 +61,74 @@ class Context(pydantic.BaseModel):
     account: Account
     watchlist: List[WatchlistItem]
 
+    # built on first use and shared by every command run against this context, along
+    # with its connection pool and quote cache
+    _broker: br.Broker = pydantic.PrivateAttr(None)
+
     @property
     def broker(self):
-        return getattr(br, self.account.broker)(
-            account_number=self.account.number,
-            access_token=self.account.token,
-            env="api",  # TODO: This is obviously hardcoded. Need to change
-        )
+        if self._broker is None:
+            self._broker = getattr(br, self.account.broker)(
+                account_number=self.account.number,
+                access_token=self.account.token,
+                env="api",  # TODO: This is obviously hardcoded. Need to change
+            )
+        return self._broker
+
+    # upper cased name to item, built on first use and kept in step with the watchlist so
+    # lookups do not have to scan it
+    _watched: Dict[str, WatchlistItem] = pydantic.PrivateAttr(None)
 
-    def __del__(self):
+    @property
+    def watched(self) -> Dict[str, WatchlistItem]:
+        if self._watched is None:
+            self._watched = {item.name.upper(): item for item in self.watchlist}
+        return self._watched
+
+    def watch(self, item: WatchlistItem) -> bool:
+        if item.name.upper() in self.watched:
+            return False
+        self.watched[item.name.upper()] = item
+        self.watchlist.append(item)
+        return True
+
+    def unwatch(self, name: str):
+        item = self.watched.pop(name.upper(), None)
+        if item is not None:
+            self.watchlist.remove(item)
+
+    def clear_watchlist(self):
+        self.watched.clear()
+        self.watchlist.clear()
+
+    def save(self):
         save_context(self)
 
 
 def save_context(context_: Context):
     context_file = os.path.join(__context_dir, f"{context_.name}.yaml")
+    tmp_file = f"{context_file}.tmp"
+
+    # write to a temporary file and swap it in so a failed dump never truncates the context
+    try:
+        with open(tmp_file, "w") as file:
+            yaml.dump(context_.dict(), file, Dumper=yaml_dumper)
+    except yaml.YAMLError as error:
+        print(error)
+        os.remove(tmp_file)
+        return
 
-    with open(context_file, "w") as file:
-        try:
-            yaml.dump(context_.dict(), file)
-        except yaml.YAMLError as error:
-            print(error)
+    os.replace(tmp_file, context_file)
 
 
+# the files do not change while a command runs, so read each one at most once
+@lru_cache(maxsize=8)
 def load_context(context_name: str):
     context_file = os.path.join(__context_dir, f"{context_name}.yaml")
 
     with open(context_file, "r") as file:
         try:
-            context_yaml = yaml.safe_load(file)
+            context_yaml = yaml.load(file, Loader=yaml_loader)
         except yaml.YAMLError as error:
             print(error)
 
@@ -80,15 +147,7 @@ def switch(ctx, name):
     if ctx.invoked_subcommand is not None:
         return
 
-    home_dir = os.environ["HOME"]
-    clt_dir = ".clt"
-    clt_base_dir = os.path.join(home_dir, clt_dir)
-    context_dir = os.path.join(clt_base_dir, "context")
-
-    if not os.path.exists(context_dir):
-        os.makedirs(context_dir)
-
-    context_file = os.path.join(context_dir, f"{name}.yaml")
+    context_file = os.path.join(__context_dir, f"{name}.yaml")
 
     if not os.path.exists(context_file):
         click.echo(f"'{name}' is not a context!")
@@ -103,49 +162,25 @@ def switch(ctx, name):
 @click.argument("name")
 @click.option("-d", "--description")
 def new_context(name: str, description: str):
-    home_dir = os.environ["HOME"]
-    clt_dir = ".clt"
-    clt_base_dir = os.path.join(home_dir, clt_dir)
-    context_dir = os.path.join(clt_base_dir, "context")
-
-    if not os.path.exists(context_dir):
-        os.makedirs(context_dir)
-
-    context_file = os.path.join(context_dir, f"{name}.yaml")
+    context_file = os.path.join(__context_dir, f"{name}.yaml")
     with open(context_file, "w") as f:
         f.write(f"# {name}\n")
         if description:
             f.write(f"# {description}\n")
 
-    click.echo(clt_base_dir)
+    click.echo(BASE_DIR)
 
 
 @context.command()
 @click.argument("name")
 def rm(name: str):
-    home_dir = os.environ["HOME"]
-    clt_dir = ".clt"
-    clt_base_dir = os.path.join(home_dir, clt_dir)
-    context_dir = os.path.join(clt_base_dir, "context")
-
-    if not os.path.exists(context_dir):
-        os.makedirs(context_dir)
-
-    Path(context_dir)
+    Path(__context_dir)
     os.remove()
 
 
 @context.command(name="list")
 def list_():
-    home_dir = os.environ["HOME"]
-    clt_dir = ".clt"
-    clt_base_dir = os.path.join(home_dir, clt_dir)
-    context_dir = os.path.join(clt_base_dir, "context")
-
-    if not os.path.exists(context_dir):
-        os.makedirs(context_dir)
-
-    context_files = Path(context_dir).glob("*")
-
-    for file in context_files:
-        click.echo(file.name.split(".")[0])
+    with os.scandir(__context_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                click.echo(entry.name.split(".")[0])
@@ -2,7 +2,7 @@ import click
 
 from clt import account
 from clt import broker as br
-from clt import chart, config, context, market, position, run, watch
+from clt import cache, chart, config, context, market, position, run, watch
 from clt.utils import load_and_spin
 
 """
@@ -43,11 +43,22 @@ run: run an automated strategy
 
 
 @click.group()
+@click.option("--no-cache", is_flag=True)
 @click.pass_context
-def cli(ctx):
+def cli(ctx, no_cache):
+    if no_cache:
+        cache.disable()
+
     conf = config.load_config()
-    context_ = context.load_context(conf.context)
-    ctx.obj = {"config": conf, "context": context_}
+    ctx.obj = {"config": conf, "context": context.load_context(conf.context)}
+
+
+# only called once the invoked command has returned, so a command that fails part way
+# through never saves a half-updated context
+@cli.result_callback()
+@click.pass_context
+def save_context(ctx, result, **params):
+    ctx.obj["context"].save()
 
 
 cli.add_command(context.context)
@@ -1,8 +1,11 @@
 import click
 
+from clt.utils import asink
 
-@click.group()
-async def market():
-    broker = br.Tradier("6YA05267", access_token="ey39F8VMeFvhNsq4vavzeQXThcpL")
 
-    market_days = await broker.calendar()
+@click.group(invoke_without_command=True)
+@click.pass_context
+@asink
+async def market(ctx):
+    async with ctx.obj.get("context").broker as broker:
+        market_days = await broker.calendar()
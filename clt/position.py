@@ -1,12 +1,12 @@
 import asyncio
 from datetime import date, datetime
-from typing import Collection
+from operator import attrgetter
+from typing import Collection, List, Optional
 
 import click
-from tabulate import tabulate
 
 from clt import broker as br
-from clt.utils import asink, color_pl, load_and_spin, percent_change
+from clt.utils import asink, color_pl, gather_or_cancel, load_and_spin, percent_change
 
 
 @click.group()
@@ -15,12 +15,12 @@ def position():
 
 
 async def _wait_for_pending_orders(pending_order_ids, broker):
+    # market orders usually fill almost straight away, so check right away, then back quickly
+    # and back off to every half second for the ones that take longer
+    delay = 0.05
     while pending_order_ids:
-        await asyncio.sleep(0.5)
-
-        orders: Collection[br.Order] = await asyncio.gather(
-            *[broker.order_status(order_id) for order_id in pending_order_ids]
-        )
+        waiting = len(pending_order_ids)
+        orders: Collection[br.Order] = await broker.order_statuses(list(pending_order_ids))
 
         for order in orders:
             if order.status == br.OrderStatus.FILLED:
@@ -39,38 +39,51 @@ async def _wait_for_pending_orders(pending_order_ids, broker):
             else:
                 pass
 
+        if not pending_order_ids:
+            break
+
+        # once one order settles the rest tend to follow, so go back to checking quickly
+        if len(pending_order_ids) < waiting:
+            delay = 0.05
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
 
 @position.command(name="list")
 @click.pass_context
 @asink
 async def list_(ctx):
-    broker = ctx.obj.get("context").broker
-
-    positions, account_ = await load_and_spin(
-        asyncio.gather(broker.positions, broker.account_balance), "loading", persist=False
-    )
-
-    quotes = await load_and_spin(
-        broker.get_quotes([x.name for x in positions]), "loading", persist=False
-    )
+    async with ctx.obj.get("context").broker as broker:
+        # quotes only need the position names, so start them as soon as positions are in
+        # rather than also waiting on the balance
+        async def quoted_positions():
+            positions_ = await broker.positions
+            return positions_, await broker.get_quotes([x.name for x in positions_])
+
+        (positions, quotes), account_ = await load_and_spin(
+            gather_or_cancel(quoted_positions(), broker.account_balance), "loading", persist=False
+        )
 
     today = datetime.utcnow().date()
+    prices = {quote.name: quote.price for quote in quotes}
+    total_equity = account_.total_equity
 
     table = [
         [
             x.name,
             x.size,
-            color_pl(percent_change(x.cost_basis, y.price * x.size)),
-            ((y.price * x.size) / account_.total_equity) * 100,
+            color_pl(percent_change(x.cost_basis, prices[x.name] * x.size)),
+            ((prices[x.name] * x.size) / total_equity) * 100,
             "-",
             "-",
             (today - x.time_opened.date()).days,
         ]
-        for x, y in zip(
-            sorted(positions, key=lambda x: x.name), sorted(quotes, key=lambda x: x.name)
-        )
+        for x in sorted(positions, key=attrgetter("name"))
     ]
 
+    from tabulate import tabulate
+
     click.echo()
     click.echo(
         tabulate(
@@ -92,11 +105,11 @@ async def list_(ctx):
 
 
 async def enter_(broker, name, allocation, stop_loss, preview):
-    balances, quote, positions = await asyncio.gather(
-        broker.account_balance, broker.get_quote(name), broker.positions
+    balances, quote, held = await gather_or_cancel(
+        broker.account_balance, broker.get_quote(name), broker.position_symbols()
     )
 
-    if name in positions:
+    if name.upper() in held:
         click.echo(f"position already open for {name}")
         return
 
@@ -128,41 +141,86 @@ async def enter_(broker, name, allocation, stop_loss, preview):
             click.echo(f"Stop loss @ {stop_price:.2f} ({stop_loss}%)")
         click.confirm("Continue?", abort=True)
 
-    click.echo("placing market order")
+    click.echo(f"placing market order for {name}")
     order_id = await broker.place_market_buy(name, allocation_quantity)
 
     async for order in _wait_for_pending_orders({str(order_id)}, broker):
         if order.status != br.OrderStatus.FILLED:
-            click.echo(f"could not place market order: {order.status}")
+            click.echo(f"could not place market order for {name}: {order.status}")
             return
         else:
-            click.echo("market order filled")
+            click.echo(f"market order filled for {name}")
+            # the next lookup should not be served the quote cached from before the fill
+            broker.invalidate_quote(name)
 
     if stop_loss:
-        click.echo("placing stop loss order")
+        click.echo(f"placing stop loss order for {name}")
         stop_price = quote.price * ((100 - stop_loss) / 100)
         await broker.place_stop_loss(name, order.executed_quantity, round(stop_price, 2))
 
 
+def _split_names(names):
+    # symbols can be given space separated, comma separated or a mix of both
+    return [name for arg in names for name in arg.split(",") if name]
+
+
+def _report_failures(action: str, names, results, echo=click.echo):
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            echo(f"failed to {action} {name}: {result}")
+
+
 @position.command()
-@click.argument("name")  # , nargs=-1)
+@click.argument("names", nargs=-1, required=True)
 @click.option("-a", "--allocation", type=click.IntRange(1, 100), default=2)
 @click.option("-s", "--stop-loss", type=click.IntRange(1, 50), default=None)
 @click.option("-p", "--preview/--no-preview", default=False)
 @click.pass_context
 @asink
-async def enter(ctx, name, allocation, stop_loss, preview):
-    broker = ctx.obj.get("context").broker
-    await enter_(broker, name, allocation, stop_loss, preview)
+async def enter(ctx, names, allocation, stop_loss, preview):
+    names = _split_names(names)
+
+    async with ctx.obj.get("context").broker as broker:
+        if preview:
+            # previews prompt for confirmation, so they have to go one at a time
+            for name in names:
+                await enter_(broker, name, allocation, stop_loss, preview)
+            return
 
+        results = await asyncio.gather(
+            *[enter_(broker, name, allocation, stop_loss, preview) for name in names],
+            return_exceptions=True,
+        )
 
-async def exit_(broker, name: str):
-    orders, positions = await load_and_spin(
-        asyncio.gather(broker.orders, broker.positions), "checking", persist=False
+    _report_failures("enter", names, results)
+
+
+async def exit_(broker, name: str, lines: Optional[List[str]] = None):
+    # when exits run side by side their spinners would all draw over the same line, so a
+    # caller batching them can pass lines to collect the status of each step in instead,
+    # to be echoed once the exit is done
+    def say(line):
+        if lines is None:
+            click.echo(line)
+        else:
+            lines.append(line)
+
+    async def step(aw, info, persist=True):
+        if lines is None:
+            return await load_and_spin(aw, info, persist=persist)
+        result = await aw
+        if persist:
+            lines.append(info)
+        return result
+
+    orders, positions = await step(
+        gather_or_cancel(broker.orders, broker.positions), "checking", persist=False
     )
 
-    if name not in positions:
-        click.echo(f"{name} is not currently held")
+    pos = {x.name.upper(): x for x in positions}.get(name.upper())
+
+    if pos is None:
+        say(f"{name} is not currently held")
         return
 
     open_orders = [
@@ -172,35 +230,60 @@ async def exit_(broker, name: str):
     ]
 
     if open_orders:
-        await load_and_spin(
-            asyncio.gather(*[broker.cancel_order(order.id) for order in open_orders]),
+        # every cancel is attempted even if one of them fails
+        results = await step(
+            asyncio.gather(
+                *[broker.cancel_order(order.id) for order in open_orders], return_exceptions=True
+            ),
             "cancelling open orders",
         )
+        _report_failures("cancel order", [order.id for order in open_orders], results, say)
 
-    pos = [x for x in positions if x == name][0]
-    await load_and_spin(
-        broker.place_market_sell(name, pos.size), f"placing market sell for {name.upper()}"
-    )
+        # an order left open would still be live against the shares once they are sold
+        failed = sum(isinstance(result, Exception) for result in results)
+        if failed:
+            raise IOError(f"not selling {name}, {failed} open order(s) could not be cancelled")
+
+    await step(broker.place_market_sell(name, pos.size), f"placing market sell for {name.upper()}")
+    broker.invalidate_quote(name)
 
 
 @position.command(name="exit")
-@click.argument("name", required=False)
+@click.argument("names", nargs=-1, required=True)
 @click.pass_context
 @asink
-async def exit_command(ctx, name: str):
-    broker = ctx.obj.get("context").broker
-    await exit_(broker, name)
+async def exit_command(ctx, names):
+    names = _split_names(names)
+
+    async with ctx.obj.get("context").broker as broker:
+        if len(names) == 1:
+            results = await asyncio.gather(exit_(broker, names[0]), return_exceptions=True)
+        else:
+            # one spinner for all of them, with what happened to each name echoed after
+            lines = [[] for _ in names]
+            results = await load_and_spin(
+                asyncio.gather(
+                    *[exit_(broker, name, lines_) for name, lines_ in zip(names, lines)],
+                    return_exceptions=True,
+                ),
+                "exiting",
+                persist=False,
+            )
+            for lines_ in lines:
+                for line in lines_:
+                    click.echo(line)
+
+    _report_failures("exit", names, results)
 
 
 @position.command()
 @click.pass_context
 @asink
 async def history(ctx):
-    broker = ctx.obj.get("context").broker
-
     since = date(year=date.today().year, month=1, day=1)
 
-    pnl = await load_and_spin(broker.account_pnl(since_date=since), "loading", persist=False)
+    async with ctx.obj.get("context").broker as broker:
+        pnl = await load_and_spin(broker.account_pnl(since_date=since), "loading", persist=False)
 
     table = [
         [
@@ -212,6 +295,8 @@ async def history(ctx):
         for x in pnl
     ]
 
+    from tabulate import tabulate
+
     click.echo()
     click.echo(
         tabulate(
@@ -14,71 +14,152 @@ Things to figure out:
 """
 
 import asyncio
+import csv
+import heapq
+import io
 import string
-from datetime import timedelta
+from datetime import date, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from os import environ
-from statistics import correlation, linear_regression
+from zipfile import ZipFile
 
 import click
 import httpx
-import toolz
-from dateutil import parser
-from exchange_calendars import get_calendar
-from pandas import Timestamp
-from tenacity import AsyncRetrying, RetryError, stop_after_attempt
-from tiingo import TiingoClient
-
-from clt import position
+import orjson
+from tenacity import AsyncRetrying, RetryError, stop_after_attempt, wait_exponential
+
+from clt import cache, position
 from clt.utils import asink
 
-tiingo_client = TiingoClient()
 tiingo_token = environ.get("TIINGO_API_KEY")
 
-calendar = get_calendar("NYSE")
-
 # period over which to calculate momentum
 look_back_period = 130  # roughly about 4 days of 15min bars
 portfolio_size = 25  # target portfolio size
 quality_threshold = 0.93  # looking for r values gte this
+max_in_flight = 32  # concurrent price requests to tiingo
+max_orders_in_flight = 8  # concurrent order placements with the broker
+rebalance_hour = 13  # hour of the day, chicago time, to rebalance in
+
+tickers_url = "https://apimedia.tiingo.com/docs/tiingo/daily/supported_tickers.zip"
+
+listed_exchanges = frozenset(("NYSE", "NASDAQ", "AMEX"))
+ticker_characters = frozenset(string.ascii_letters + string.digits)
+
+
+# exchange_calendars (and pandas behind it) is slow to import and build,
+# so only pay for it once a strategy actually runs rather than on every clt invocation
+@lru_cache(maxsize=1)
+def nyse_calendar():
+    from exchange_calendars import get_calendar
+
+    return get_calendar("NYSE")
+
+
+def tiingo_session() -> httpx.AsyncClient:
+    # one pooled client for the whole run so the hundreds of price requests per rebalance
+    # share connections instead of each paying for its own TLS handshake
+    return httpx.AsyncClient(
+        base_url="https://api.tiingo.com",
+        headers={"Authorization": f"Token {tiingo_token}"},
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+        timeout=5,
+    )
+
 
+# walking the calendar back is the same for every symbol and every loop on a given day
+@lru_cache(maxsize=256)
+def previous_session(session):
+    return nyse_calendar().previous_session(session)
 
+
+@lru_cache(maxsize=256)
 def session_subtract(session, n):
     while n > 0:
-        session = calendar.previous_session(session)
+        session = previous_session(session)
         n -= 1
     return session
 
 
-async def fetch_symbols(today, broker, allocation):
-    # filter on types of symbols
-    desirable_characters = string.ascii_letters + string.digits
-    last_session = calendar.previous_session(today).date()
-    # last_session = calendar.previous_session(today - timedelta(days=2)).date()
+@lru_cache(maxsize=256)
+def next_session(day):
+    return nyse_calendar().date_to_session(day + timedelta(days=1), direction="next").date()
+
+
+# the run loop checks these every time it wakes but the answer only changes once a day
+@lru_cache(maxsize=8)
+def session_minutes(day):
+    if not nyse_calendar().is_session(day):
+        return None
+    return nyse_calendar().session_first_minute(day), nyse_calendar().session_last_minute(day)
+
+
+def next_wakeup(now, today, refreshed, rebalanced):
+    # there is only something to do in the few minutes before the open and in the rebalance
+    # hour, so the run loop can sleep straight through to whichever of those comes next
+    from pandas import Timestamp
+
+    minutes = session_minutes(today)
+    if minutes is not None:
+        first_minute, last_minute = minutes
+        if not refreshed and now < first_minute:
+            return max(now, first_minute - timedelta(minutes=10))
+
+        rebalance_at = Timestamp(today).tz_localize("America/Chicago") + timedelta(
+            hours=rebalance_hour
+        )
+        if not rebalanced and now < min(rebalance_at + timedelta(hours=1), last_minute):
+            return max(now, rebalance_at)
+
+    first_minute, _ = session_minutes(next_session(today))
+    return first_minute - timedelta(minutes=10)
+
+
+async def listed_symbols(today):
+    # the listing only changes from one day to the next, so the filtered symbols are kept on
+    # disk and the full ticker list is only pulled from tiingo once a day
+    cached = cache.get("tiingo.symbols", ttl=24 * 60 * 60)
+    if cached is not None and cached["day"] == str(today):
+        return cached["symbols"]
+
+    last_session = previous_session(today).date()
+    # last_session = nyse_calendar().previous_session(today - timedelta(days=2)).date()
     # today = Timestamp.utcnow().date() - timedelta(days=2)
+    trading_days = {today, last_session}
 
-    symbols = [
-        x["ticker"]
-        for x in tiingo_client.list_stock_tickers()
-        if x["exchange"] in ("NYSE", "NASDAQ", "AMEX")
-        and x["assetType"].lower() == "stock"
-        and x["endDate"]
-        and parser.parse(x["endDate"]).date() in (today, last_session)
-        and all([y in desirable_characters for y in x["ticker"]])
-    ]
-
-    async with httpx.AsyncClient() as client:
+    # the listing is a public file on tiingo's media host, so it is fetched without the
+    # api token rather than through the authenticated session
+    async with httpx.AsyncClient(timeout=30) as media:
         async for attempt in AsyncRetrying(stop=stop_after_attempt(3)):
             with attempt:
-                resp = await client.get(
-                    f"https://api.tiingo.com/tiingo/daily/prices",
-                    headers={"Authorization": f"Token {tiingo_token}"},
-                    timeout=5,
-                )
-        daily_prices = [
-            (item["ticker"].upper(), {"close": item["close"], "volume": item["volume"]})
-            for item in resp.json()
-            if item["ticker"].upper() in symbols
-        ]
+                resp = await media.get(tickers_url)
+                resp.raise_for_status()
+
+    # filter on types of symbols, cheapest checks first so the end date is only parsed for
+    # stocks on one of the listed exchanges. rows are read straight out of the archive one
+    # at a time rather than building the whole listing up first
+    symbols = []
+    with ZipFile(io.BytesIO(resp.content)) as archive, archive.open("supported_tickers.csv") as f:
+        for x in csv.DictReader(io.TextIOWrapper(f, encoding="utf-8", newline="")):
+            if x["exchange"] not in listed_exchanges or x["assetType"].lower() != "stock":
+                continue
+            if not x["endDate"] or date.fromisoformat(x["endDate"][:10]) not in trading_days:
+                continue
+            if ticker_characters.issuperset(x["ticker"]):
+                symbols.append(x["ticker"])
+
+    cache.put("tiingo.symbols", {"day": str(today), "symbols": symbols})
+    return symbols
+
+
+async def fetch_symbols(today, broker, tiingo, allocation):
+    symbols = set(await listed_symbols(today))
+
+    async for attempt in AsyncRetrying(stop=stop_after_attempt(3)):
+        with attempt:
+            resp = await tiingo.get("/tiingo/daily/prices")
 
     balance = await broker.account_balance
     account_base = balance.total_equity - balance.open_pl
@@ -86,131 +167,192 @@ async def fetch_symbols(today, broker, allocation):
 
     # TODO: filter for price that makes sense
     # TODO: switch this to percentage later
-    affordable_daily_prices = [
-        (symbol, data) for symbol, data in daily_prices if data and data["close"] <= max_price
-    ]
-    high_volume_filtered = sorted(affordable_daily_prices, key=lambda x: x[1]["volume"])[-4000:]
+    affordable_volumes = (
+        (symbol, item["volume"])
+        for item in orjson.loads(resp.content)
+        if (symbol := item["ticker"].upper()) in symbols and item["close"] <= max_price
+    )
+    # only the top few thousand by volume are wanted, no need to sort the whole listing
+    high_volume_filtered = heapq.nlargest(4000, affordable_volumes, key=itemgetter(1))
     return [symbol for symbol, _ in high_volume_filtered]
 
 
-async def rebalance(broker, today, symbols):
-    last_session = calendar.previous_session(today)
-    # last_session = calendar.previous_session(today - timedelta(days=3))
+async def rebalance(broker, tiingo, today, symbols):
+    last_session = previous_session(today)
+    # last_session = nyse_calendar().previous_session(today - timedelta(days=3))
+
+    # the same for every symbol
+    params = {
+        "resampleFreq": "15min",
+        "columns": "date,close,volume",
+        "startDate": str(session_subtract(last_session, 4).date()),
+    }
+
+    # keeps the number of requests in flight to tiingo bounded however many symbols there are
+    in_flight = asyncio.Semaphore(max_in_flight)
+
+    # cleared while tiingo has asked us to back off so that every request waits, not just
+    # the one that got the 429
+    not_limited = asyncio.Event()
+    not_limited.set()
+
+    async def back_off(resp):
+        if not not_limited.is_set():
+            return
+        retry_after = resp.headers.get("Retry-After", "")
+        not_limited.clear()
+        print("Hit request limit")
+        await asyncio.sleep(float(retry_after) if retry_after.isdigit() else 1.0)
+        not_limited.set()
 
     # Fetch price data for each name
     async def get_price(symbol):
-        async with httpx.AsyncClient() as client:
+        async with in_flight:
             try:
-                async for attempt in AsyncRetrying(stop=stop_after_attempt(3)):
+                async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(5), wait=wait_exponential(max=8)
+                ):
                     with attempt:
-                        resp = await client.get(
-                            f"https://api.tiingo.com/iex/{symbol}/prices",
-                            params={
-                                "resampleFreq": "15min",
-                                "columns": "date,close,volume",
-                                "startDate": str(session_subtract(last_session, 4).date()),
-                            },
-                            headers={"Authorization": f"Token {tiingo_token}"},
-                            timeout=5,
-                        )
+                        await not_limited.wait()
+                        resp = await tiingo.get(f"/iex/{symbol}/prices", params=params)
                         if resp.status_code == httpx.codes.TOO_MANY_REQUESTS:
-                            print("Hit request limit")
-                            return symbol, {}
-                        return symbol, resp.json()
+                            # retried once tiingo lets us back in rather than dropping the name
+                            await back_off(resp)
+                            raise IOError(f"tiingo request limit hit for {symbol}")
+                        return symbol, orjson.loads(resp.content)
             except RetryError:
                 print(f"Failed to get minute prices for {symbol}")
                 return symbol, []
 
-    chunked_tasks = toolz.partition(300, [get_price(symbol) for symbol in symbols])
-    minute_prices = []
-    for chunk in chunked_tasks:
-        minute_prices += await asyncio.gather(*chunk)
-        await asyncio.sleep(2)
+    import numpy
 
-    # compute correlation and slope for each name
-    momentum_quality = set()
-    r_values = []
-    for symbol, data in minute_prices:
+    # collect close prices as they come in, one row per name and right aligned on the most
+    # recent bar. names with a shorter history are padded with nan at the front
+    names = []
+    closes = numpy.full((len(symbols), look_back_period), numpy.nan)
+    for minute_prices in asyncio.as_completed([get_price(symbol) for symbol in symbols]):
+        symbol, data = await minute_prices
         try:
             close_prices = [x["close"] for x in data[-look_back_period:]]
         except TypeError as error:
             print(error)
             continue
-        rng = list(range(1, len(close_prices) + 1))
-        try:
-            r_value = correlation(rng, close_prices)
-            if r_value < quality_threshold:
-                continue  # only the highest quality
-            r_values.append((symbol, r_value))
-        except Exception as e:
-            print(f"Error in computing correlation for {symbol}: {e}")
-            print(data)
-            continue
-        slope = linear_regression(rng, close_prices).slope
-        # momentum_quality.add((symbol, slope * r_value**2))
-        momentum_quality.add((symbol, slope))
-
-    # sort momentum quality
-    top_ranked_momentum = [
-        name
-        for name, _ in sorted(momentum_quality, key=lambda _: _[1], reverse=True)[:portfolio_size]
-    ]
+        if close_prices:
+            closes[len(names), look_back_period - len(close_prices) :] = close_prices
+        names.append(symbol)
+    closes = closes[: len(names)]
+
+    # compute correlation and slope of close against bar number for every name at once
+    valid = ~numpy.isnan(closes)
+    counts = valid.sum(axis=1)
+    bars = numpy.where(valid, numpy.arange(1, look_back_period + 1), 0.0)
+    closes = numpy.where(valid, closes, 0.0)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        bar_deviations = numpy.where(valid, bars - (bars.sum(axis=1) / counts)[:, None], 0.0)
+        close_deviations = numpy.where(valid, closes - (closes.sum(axis=1) / counts)[:, None], 0.0)
+        covariances = (bar_deviations * close_deviations).sum(axis=1)
+        bar_variances = (bar_deviations**2).sum(axis=1)
+        close_variances = (close_deviations**2).sum(axis=1)
+        slopes = covariances / bar_variances
+        r_values = covariances / numpy.sqrt(bar_variances * close_variances)
+
+    # fewer than two prices or a flat line has no correlation
+    for i in numpy.flatnonzero(numpy.isnan(r_values)):
+        print(f"Error in computing correlation for {names[i]}: not enough price movement")
+
+    # only the highest quality, ranked by slope
+    # momentum_quality = slopes * r_values**2
+    momentum_quality = numpy.flatnonzero(r_values >= quality_threshold)
+
+    # partition out the top names first so only those few are actually sorted
+    if len(momentum_quality) > portfolio_size:
+        top = numpy.argpartition(-slopes[momentum_quality], portfolio_size)[:portfolio_size]
+        momentum_quality = momentum_quality[top]
+
+    ranked = momentum_quality[numpy.argsort(-slopes[momentum_quality])]
+    top_ranked_momentum = [names[i] for i in ranked]
 
     # get current portfolio
-    positions = {pos.name: pos for pos in await broker.positions}
-    position_names = positions.keys()
+    held = frozenset(pos.name for pos in await broker.positions)
+    target = frozenset(top_ranked_momentum)
 
     # diff top names and current names to establish what to sell and what to buy
-    names_to_buy = set(top_ranked_momentum) - set(position_names)
-    names_to_sell = set(position_names) - set(top_ranked_momentum)
+    names_to_buy = target - held
+    names_to_sell = held - target
+
+    # orders go out a few at a time rather than one name after another, but bounded so a
+    # full turnover doesn't flood tradier
+    in_flight = asyncio.Semaphore(max_orders_in_flight)
+
+    async def close_out(name):
+        async with in_flight:
+            # each exit's steps are echoed together once it is done rather than as spinners
+            # that would draw over each other
+            lines = [f"attempting to close out {name}"]
+            try:
+                await position.exit_(broker, name, lines)
+            finally:
+                click.echo("\n".join(lines))
+
+    async def enter_into(name):
+        async with in_flight:
+            click.echo(f"attempting to enter into {name}")
+            await position.enter_(broker, name, (100 // portfolio_size), None, False)
 
-    # sell what needs to be sold
-    for name in names_to_sell:
-        click.echo(f"attempting to close out {name}")
-        await position.exit_(broker, name)
+    # sell what needs to be sold, all of it before buying so the proceeds are counted
+    names_to_sell = list(names_to_sell)
+    results = await asyncio.gather(*map(close_out, names_to_sell), return_exceptions=True)
+    position._report_failures("exit", names_to_sell, results)
 
     # buy what needs to be bought if we have the settled cash to do so
-    for name in names_to_buy:
-        click.echo(f"attempting to enter into {name}")
-        await position.enter_(broker, name, (100 // portfolio_size), None, False)
+    names_to_buy = list(names_to_buy)
+    results = await asyncio.gather(*map(enter_into, names_to_buy), return_exceptions=True)
+    position._report_failures("enter", names_to_buy, results)
 
 
 @click.command
 @click.pass_context
 @asink
 async def run(ctx):
-    broker = ctx.obj.get("context").broker
-
-    # Need to grab symbols here to initialize
-    symbols = await fetch_symbols(Timestamp.utcnow().date(), broker, portfolio_size)
-    last_symbol_refresh = Timestamp.today().date()  # check this will work with other tz times
-    last_rebalance = Timestamp.today().date() - timedelta(days=1)
-
-    while True:
-        now = Timestamp.utcnow()
-        today = now.today().date()
-
-        if not calendar.is_session(today):
-            await asyncio.sleep(5)
-            continue
-
-        # setup rebalance frequency
-        first_minute = calendar.session_first_minute(today)
-        last_minute = calendar.session_last_minute(today)
-
-        if first_minute <= now < last_minute:
-            # market is open
-            # rebalance every day at noon
-            if now.tz_convert("America/Chicago").hour == 13:
-                if last_rebalance < today:
-                    click.echo("Rebalancing")
-                    await rebalance(broker, today, symbols)
-                    last_rebalance = today
-        elif (first_minute - timedelta(minutes=10)) < now < first_minute:
-            # update the symbols list
-            if not symbols or last_symbol_refresh < today:
-                click.echo("Refreshing symbols list")
-                symbols = await fetch_symbols(today, broker, portfolio_size)
-                last_symbol_refresh = today
-
-        await asyncio.sleep(5)
+    from pandas import Timestamp
+
+    async with ctx.obj.get("context").broker as broker, tiingo_session() as tiingo:
+        # Need to grab symbols here to initialize
+        symbols = await fetch_symbols(Timestamp.utcnow().date(), broker, tiingo, portfolio_size)
+        last_symbol_refresh = Timestamp.today().date()  # check this will work with other tz times
+        last_rebalance = Timestamp.today().date() - timedelta(days=1)
+
+        while True:
+            now = Timestamp.utcnow()
+            today = now.today().date()
+
+            minutes = session_minutes(today)
+            if minutes is not None:
+                # setup rebalance frequency
+                first_minute, last_minute = minutes
+
+                if first_minute <= now < last_minute:
+                    # market is open
+                    # rebalance every day at noon
+                    if now.tz_convert("America/Chicago").hour == rebalance_hour:
+                        if last_rebalance < today:
+                            click.echo("Rebalancing")
+                            await rebalance(broker, tiingo, today, symbols)
+                            last_rebalance = today
+                elif (first_minute - timedelta(minutes=10)) <= now < first_minute:
+                    # update the symbols list
+                    if not symbols or last_symbol_refresh < today:
+                        click.echo("Refreshing symbols list")
+                        symbols = await fetch_symbols(today, broker, tiingo, portfolio_size)
+                        last_symbol_refresh = today
+
+            wakeup = next_wakeup(
+                now,
+                today,
+                refreshed=bool(symbols) and last_symbol_refresh >= today,
+                rebalanced=last_rebalance >= today,
+            )
+            # never less than a second so a missed window can't spin, and at least hourly in
+            # case the clock jumps while asleep
+            delay = (wakeup - Timestamp.utcnow()).total_seconds()
+            await asyncio.sleep(min(max(delay, 1), 60 * 60))
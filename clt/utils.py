@@ -3,6 +3,13 @@ import itertools
 import sys
 from functools import wraps
 
+try:
+    import uvloop
+except ImportError:  # not available on windows
+    uvloop = None
+else:
+    uvloop.install()
+
 
 def asink(f):
     @wraps(f)
@@ -12,23 +19,43 @@ def asink(f):
     return wrapper
 
 
+async def gather_or_cancel(*aws):
+    # like asyncio.gather, but the first failure cancels whatever is still in flight rather
+    # than leaving it to finish requests nobody will use
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
 async def load_and_spin(coroutine, info: str, persist: bool = True):
     task = asyncio.ensure_future(coroutine)
 
-    spinner = itertools.cycle(["|", "/", "-", "\\"])
+    # nobody is watching a spinner that is piped to a file, so just wait for the result
+    if not sys.stdout.isatty():
+        result = await task
+        if persist:
+            sys.stdout.write(f"{info}\n")
+        return result
+
+    # every frame is built once up front and drawn with a single write
+    spinner = itertools.cycle([f"\r{info} {cyan(x)} " for x in ("|", "/", "-", "\\")])
 
     while not task.done():
-        sys.stdout.write("\r")
-        sys.stdout.write(f"{info} {cyan(next(spinner))} ")
+        sys.stdout.write(next(spinner))
         sys.stdout.flush()
-        await asyncio.sleep(0.1)
+        # wake up as soon as the task finishes rather than on the next spinner tick
+        await asyncio.wait((task,), timeout=0.25)
 
     if persist:
         sys.stdout.write("\r")
         sys.stdout.write(f"{info}  \n")
     else:
         sys.stdout.write("\r")
-        sys.stdout.write(" " * len(f"{info} {cyan(next(spinner))} "))
+        sys.stdout.write(" " * (len(next(spinner)) - 1))
         sys.stdout.write("\r")
 
     return task.result()
@@ -17,11 +17,8 @@ def watch():
 def add(ctx, name: str, notes: str):
 
     context: Context = ctx.obj["context"]
-    watchlist: List[WatchlistItem] = context.watchlist
 
-    if name not in watchlist:
-        watchlist.append(WatchlistItem(name=name.upper(), notes=notes))
-    else:
+    if not context.watch(WatchlistItem(name=name.upper(), notes=notes)):
         click.echo(f"{name.upper()} is already being watched")
 
 
@@ -31,16 +28,7 @@ def add(ctx, name: str, notes: str):
 def remove(ctx, name: str):
 
     context: Context = ctx.obj["context"]
-    watchlist: List[WatchlistItem] = context.watchlist
-
-    to_be_removed = None
-
-    for x in watchlist:
-        if x.name.lower() == name.lower():
-            to_be_removed = x
-
-    if to_be_removed is not None:
-        watchlist.remove(to_be_removed)
+    context.unwatch(name)
 
 
 @watch.command()
@@ -48,8 +36,7 @@ def remove(ctx, name: str):
 def clear(ctx):
 
     context: Context = ctx.obj["context"]
-    watchlist: List[WatchlistItem] = context.watchlist
-    watchlist.clear()
+    context.clear_watchlist()
 
 
 @watch.command(name="list")
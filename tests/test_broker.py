@@ -0,0 +1,164 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from datetime import date
+
+import httpx
+
+from clt import broker as br
+from clt import cache
+
+
+class CoalescedQuotesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.broker = br.Tradier("ACCOUNT", access_token="token")
+        self.requested = []
+
+        async def get_quotes(names):
+            self.requested.append(sorted(names))
+            await asyncio.sleep(0.01)
+            return [br.Quote(name=name, price=12.5) for name in names]
+
+        self.broker.get_quotes = get_quotes
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        first = asyncio.ensure_future(self.broker.get_quote("AAPL"))
+        second = asyncio.ensure_future(self.broker.get_quote("aapl"))
+        await asyncio.sleep(0)
+
+        first.cancel()
+
+        self.assertEqual(await second, br.Quote(name="AAPL", price=12.5))
+        self.assertTrue(first.cancelled())
+        self.assertEqual(self.requested, [["AAPL"]])
+
+    async def test_cancelled_future_does_not_stop_the_batch(self):
+        loop = asyncio.get_running_loop()
+        cancelled, waiting = loop.create_future(), loop.create_future()
+        cancelled.cancel()
+
+        await self.broker._resolve_quotes({"AAPL": cancelled, "MSFT": waiting})
+
+        self.assertEqual(waiting.result(), br.Quote(name="MSFT", price=12.5))
+
+
+class BrokerCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir, cache._cache_dir = cache._cache_dir, cache_dir.name
+        self.addCleanup(setattr, cache, "_cache_dir", self.cache_dir)
+
+        self.requests = []
+        self.closed = [
+            {"symbol": "AAPL", "quantity": 1, "cost": 10.0, "proceeds": 12.0,
+             "open_date": "2023-01-01T00:00:00.000Z", "close_date": "2023-02-01T00:00:00.000Z"},
+            {"symbol": "MSFT", "quantity": 1, "cost": 20.0, "proceeds": 25.0,
+             "open_date": "2023-01-02T00:00:00.000Z", "close_date": "2023-03-01T00:00:00.000Z"},
+        ]  # fmt: skip
+
+        self.broker = br.Tradier("ACCOUNT", access_token="token")
+        self.broker._new_client = lambda: httpx.AsyncClient(
+            base_url="https://api.tradier.com/v1", transport=httpx.MockTransport(self.respond)
+        )
+
+    async def asyncTearDown(self):
+        await self.broker.aclose()
+
+    def respond(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+
+        if path.endswith("/balances/"):
+            cash = {"cash_available": 10.0, "unsettled_funds": 2.0}
+            return httpx.Response(
+                200,
+                json={
+                    "balances": {"total_cash": 10.0, "total_equity": 100.0, "open_pl": 5.0,
+                                 "long_market_value": 90.0, "account_type": "cash", "cash": cash}
+                },
+            )  # fmt: skip
+        if path.endswith("/orders") and request.method == "POST":
+            return httpx.Response(200, json={"order": {"id": 42, "status": "ok"}})
+        if "/orders/" in path and request.method == "DELETE":
+            return httpx.Response(200, json={"order": {"id": 42, "status": "ok"}})
+        if path.endswith("/gainloss"):
+            start = request.url.params.get("start", "")
+            closed = [x for x in self.closed if x["close_date"][:10] >= start]
+            return httpx.Response(200, json={"gainloss": {"closed_position": closed}})
+        if path.endswith("/markets/calendar/"):
+            day = {
+                "date": "2023-05-01",
+                "status": "open",
+                "open": {"start": "09:30", "end": "16:00"},
+            }
+            return httpx.Response(200, json={"calendar": {"days": {"day": [day]}}})
+        if path.endswith("/markets/quotes/"):
+            names = request.url.params["symbols"].split(",")
+            quotes = [{"symbol": name, "last": 12.5} for name in names]
+            return httpx.Response(200, json={"quotes": {"quote": quotes}})
+
+        return httpx.Response(404)
+
+    def requested(self, suffix):
+        return [x for x in self.requests if x.url.path.endswith(suffix)]
+
+    async def test_ttl_cache_serves_from_disk_until_expired(self):
+        await self.broker.account_balance
+        await self.broker.account_balance
+        self.assertEqual(len(self.requested("/balances/")), 1)
+
+        # age the cached file past the balances ttl
+        cache_file = cache._cache_file("ACCOUNT._fetch_balances")
+        stale = time.time() - 60
+        os.utime(cache_file, (stale, stale))
+
+        await self.broker.account_balance
+        self.assertEqual(len(self.requested("/balances/")), 2)
+
+    async def test_orders_clear_account_cache_but_not_calendar(self):
+        await self.broker.account_balance
+        await self.broker.calendar()
+
+        await self.broker.place_market_buy("AAPL", 1)
+        await self.broker.account_balance
+        self.assertEqual(len(self.requested("/balances/")), 2)
+
+        await self.broker.cancel_order(42)
+        await self.broker.account_balance
+        self.assertEqual(len(self.requested("/balances/")), 3)
+
+        await self.broker.calendar()
+        self.assertEqual(len(self.requested("/markets/calendar/")), 1)
+
+    async def test_gainloss_is_refetched_from_the_latest_close(self):
+        since = date(2023, 1, 1)
+        first = await self.broker.account_pnl(since_date=since)
+        self.assertEqual([x.name for x in first], ["AAPL", "MSFT"])
+
+        self.closed.append(
+            {"symbol": "IBM", "quantity": 2, "cost": 30.0, "proceeds": 31.0,
+             "open_date": "2023-02-01T00:00:00.000Z", "close_date": "2023-04-01T00:00:00.000Z"}
+        )  # fmt: skip
+        second = await self.broker.account_pnl(since_date=since)
+
+        starts = [x.url.params.get("start") for x in self.requested("/gainloss")]
+        self.assertEqual(starts, ["2023-01-01", "2023-03-01"])
+        self.assertEqual([x.name for x in second], ["AAPL", "MSFT", "IBM"])
+
+    async def test_partial_quote_cache_hit_keeps_request_order(self):
+        await self.broker.get_quotes(["MSFT"])
+
+        quotes = await self.broker.get_quotes(["AAPL", "msft", "IBM"])
+
+        self.assertEqual([x.name for x in quotes], ["AAPL", "MSFT", "IBM"])
+        self.assertEqual(
+            [x.url.params["symbols"] for x in self.requested("/markets/quotes/")],
+            ["MSFT", "AAPL,IBM"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()